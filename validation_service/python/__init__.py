@@ -8,6 +8,7 @@ __author__ = "Nicolas A. A."
 __license__ = "MIT"
 __all__: list[str] = [
     "validate_share",
+    "validate_share_digest",
     "detect_fraud",
     "runner",
 ]
@@ -19,9 +20,9 @@ _logger.debug("Módulo 'validation-service.python' carregado com sucesso.")
 
 # Importação protegida para controle de integridade do pacote
 try:
-    from .validate_share import validate_share, ValidationResult
+    from .validate_share import validate_share, validate_share_digest, ShareValidator
     from .detect_fraud import detect_fraud, FraudDetector, FraudPolicy
-    from .runner import run_analysis_pipeline
+    from .runner import run_validation, run_validation_batch, ValidationRunner
 except ImportError as err:
     raise ImportError(
         f"[Pacote: validation-service] Falha ao carregar dependência interna: {err}"
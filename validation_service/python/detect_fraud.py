@@ -1,91 +1,263 @@
 import time
 import json
-import math
-from typing import List, Dict, Tuple, Any, Optional
-from collections import defaultdict
+import threading
+import weakref
+from typing import Deque, Dict, Tuple, Any, Optional, TextIO
+from collections import OrderedDict, deque
 from pathlib import Path
 
+MIN_NONCE_STD = 10
+REPORT_FLUSH_COUNT = 64
+REPORT_FLUSH_SECONDS = 1.0
+
 
 class FraudPolicy:
-    def __init__(self, name: str = "default", window_seconds: int = 300, max_shares: int = 200, min_avg_nonce: float = 1000.0):
+    __slots__ = ("name", "window_seconds", "max_shares", "min_avg_nonce", "max_keys")
+
+    def __init__(self, name: str = "default", window_seconds: int = 300, max_shares: int = 200, min_avg_nonce: float = 1000.0, max_keys: int = 100_000):
         self.name = name
         self.window_seconds = window_seconds
         self.max_shares = max_shares
         self.min_avg_nonce = min_avg_nonce
+        self.max_keys = max_keys
+
+
+class ShareWindow:
+    __slots__ = ("entries", "maxlen", "nonce_sum", "nonce_sq_sum")
+
+    def __init__(self, maxlen: int):
+        self.entries: Deque[Tuple[float, int]] = deque()
+        self.maxlen = maxlen
+        self.nonce_sum = 0
+        self.nonce_sq_sum = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def append(self, ts: float, nonce: int):
+        if len(self.entries) >= self.maxlen:
+            self.popleft()
+        self.entries.append((ts, nonce))
+        self.nonce_sum += nonce
+        self.nonce_sq_sum += nonce * nonce
+
+    def popleft(self):
+        _, nonce = self.entries.popleft()
+        self.nonce_sum -= nonce
+        self.nonce_sq_sum -= nonce * nonce
+
+    def resize(self, maxlen: int):
+        self.maxlen = maxlen
+        while len(self.entries) > maxlen:
+            self.popleft()
+
+    def evict_before(self, min_ts: float):
+        entries = self.entries
+        while entries and entries[0][0] < min_ts:
+            self.popleft()
+
+
+WindowKey = Tuple[str, str]
+
+
+class LRUWindowCache:
+    __slots__ = ("max_keys", "window_size", "windows")
+
+    def __init__(self, max_keys: int, window_size: int):
+        self.max_keys = max_keys
+        self.window_size = window_size
+        self.windows: "OrderedDict[WindowKey, ShareWindow]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    def __contains__(self, key: WindowKey) -> bool:
+        return key in self.windows
+
+    def __getitem__(self, key: WindowKey) -> ShareWindow:
+        return self.windows[key]
+
+    def get_or_create(self, key: WindowKey) -> ShareWindow:
+        windows = self.windows
+        window = windows.get(key)
+        if window is not None:
+            windows.move_to_end(key)
+            return window
+        window = ShareWindow(maxlen=self.window_size)
+        windows[key] = window
+        if len(windows) > self.max_keys:
+            windows.popitem(last=False)
+        return window
+
+    def resize(self, max_keys: int, window_size: int):
+        self.max_keys = max_keys
+        self.window_size = window_size
+        windows = self.windows
+        while len(windows) > max_keys:
+            windows.popitem(last=False)
+        for window in windows.values():
+            window.resize(window_size)
 
 
 class FraudDetector:
+    __slots__ = (
+        "policy", "trust_input", "log", "persist_path", "cache", "_persist_fh",
+        "_window", "_max_shares", "_min_avg",
+        "_persist_lock", "_pending_reports", "_flush_timer", "_finalizer", "__weakref__"
+    )
+
     def __init__(
         self,
         policy: FraudPolicy = FraudPolicy(),
         persist_path: Optional[str] = None,
-        logger: Optional[callable] = None
+        logger: Optional[callable] = None,
+        trust_input: bool = False
     ):
         self.policy = policy
+        self._window = policy.window_seconds
+        self._max_shares = policy.max_shares
+        self._min_avg = policy.min_avg_nonce
+        self.trust_input = trust_input
         self.log = logger or (lambda *a, **k: None)
         self.persist_path = Path(persist_path) if persist_path else None
-        self.cache: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+        self.cache = LRUWindowCache(
+            max_keys=policy.max_keys,
+            window_size=policy.max_shares + 1
+        )
+        self._persist_fh: Optional[TextIO] = None
+        self._persist_lock = threading.Lock()
+        self._pending_reports = 0
+        self._flush_timer: Optional[threading.Timer] = None
+        self._finalizer = None
+        if self.persist_path:
+            try:
+                self._persist_fh = self.persist_path.open("a", encoding="utf-8", buffering=65536)
+                # Fecha o arquivo na coleta do detector ou no encerramento, sem prender a instância
+                self._finalizer = weakref.finalize(self, self._persist_fh.close)
+            except Exception as err:
+                self.log("error", "Failed to open fraud report file.", {"err": str(err)})
+
+    def refresh_policy(self):
+        policy = self.policy
+        self._window = policy.window_seconds
+        self._max_shares = policy.max_shares
+        self._min_avg = policy.min_avg_nonce
+        self.cache.resize(policy.max_keys, policy.max_shares + 1)
+
+    def flush(self):
+        with self._persist_lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._persist_lock:
+            self._cancel_flush_timer()
+            if self._finalizer:
+                self._finalizer()
+            self._persist_fh = None
+
+    def _flush_locked(self):
+        self._cancel_flush_timer()
+        self._pending_reports = 0
+        if self._persist_fh:
+            self._persist_fh.flush()
+
+    def _cancel_flush_timer(self):
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
 
     def analyze(self, share: Dict[str, Any]) -> Tuple[bool, str]:
-        key = self._compose_key(share)
         nonce = share.get("nonce")
         ts = share.get("timestamp")
+        wid = share.get("worker_id", "")
+        ip = share.get("ip", "")
 
-        if not key or not isinstance(nonce, int) or not isinstance(ts, (float, int)):
+        # Com trust_input o chamador já validou o schema (ShareValidator), mas o
+        # validador também aceita nonces str/float: esses nunca entram na janela
+        # e, no modo confiável, são rejeitados para não escapar da detecção.
+        if not isinstance(nonce, int):
+            self.log("warn", "Malformed share ignored.", share)
+            return not self.trust_input, "Malformed or incomplete share."
+        if not self.trust_input and not isinstance(ts, (float, int)):
             self.log("warn", "Malformed share ignored.", share)
             return True, "Malformed or incomplete share."
 
-        self._record(key, nonce, ts)
+        window = self._record(wid, ip, nonce, ts)
 
-        if self._is_spam(key):
+        if self._is_spam(window):
             msg = "Excessive share frequency."
             self._report_suspicious(share, msg)
             return False, msg
 
-        if self._nonce_pattern(key):
+        if self._nonce_pattern(window):
             msg = "Suspicious nonce uniformity."
             self._report_suspicious(share, msg)
             return False, msg
 
         return True, "Accepted."
 
-    def _record(self, key: str, nonce: int, ts: float):
-        self.cache[key].append((ts, nonce))
-        min_ts = ts - self.policy.window_seconds
-        self.cache[key] = [x for x in self.cache[key] if x[0] >= min_ts]
+    def _record(self, wid: Any, ip: Any, nonce: int, ts: float) -> ShareWindow:
+        key = (
+            (wid if isinstance(wid, str) else str(wid)).strip(),
+            (ip if isinstance(ip, str) else str(ip)).strip()
+        )
+        window = self.cache.get_or_create(key)
+        window.append(ts, nonce)
+        window.evict_before(ts - self._window)
+        return window
 
-    def _is_spam(self, key: str) -> bool:
-        return len(self.cache[key]) > self.policy.max_shares
+    def _is_spam(self, window: ShareWindow) -> bool:
+        return len(window) > self._max_shares
 
-    def _nonce_pattern(self, key: str) -> bool:
-        nonces = [n for _, n in self.cache[key]]
-        if not nonces:
+    def _nonce_pattern(self, window: ShareWindow) -> bool:
+        n = len(window)
+        if not n:
             return False
-        avg = sum(nonces) / len(nonces)
-        var = sum((x - avg) ** 2 for x in nonces) / len(nonces)
-        std = math.sqrt(var)
-        return avg < self.policy.min_avg_nonce or std < 10.0
-
-    def _compose_key(self, share: Dict[str, Any]) -> str:
-        wid = str(share.get("worker_id", "")).strip()
-        ip = str(share.get("ip", "")).strip()
-        return f"{wid}|{ip}"
+        total = window.nonce_sum
+        # Scaled by n and n*n so mean and variance compare without division or sqrt.
+        if total < self._min_avg * n:
+            return True
+        return n * window.nonce_sq_sum - total * total < MIN_NONCE_STD * MIN_NONCE_STD * n * n
 
     def _report_suspicious(self, share: Dict[str, Any], reason: str):
-        payload = {
-            "reason": reason,
-            "share": share,
-            "ts": time.time()
-        }
         self.log("alert", reason, share)
-        if self.persist_path:
+        if self._persist_fh:
+            payload = {
+                "reason": reason,
+                "share": share,
+                "ts": time.time()
+            }
             try:
-                with self.persist_path.open("a", encoding="utf-8") as f:
-                    f.write(json.dumps(payload) + "\n")
+                with self._persist_lock:
+                    if not self._persist_fh:
+                        return
+                    self._persist_fh.write(json.dumps(payload, default=_json_default) + "\n")
+                    self._pending_reports += 1
+                    if self._pending_reports >= REPORT_FLUSH_COUNT:
+                        self._flush_locked()
+                    elif self._flush_timer is None:
+                        # Garante que o fim de uma rajada chegue ao disco mesmo sem novos alertas
+                        timer = threading.Timer(REPORT_FLUSH_SECONDS, _flush_detector, (weakref.ref(self),))
+                        timer.daemon = True
+                        self._flush_timer = timer
+                        timer.start()
             except Exception as err:
                 self.log("error", "Failed to persist fraud report.", {"err": str(err)})
 
 
+def _json_default(value: Any) -> str:
+    # Hashes podem chegar como bytes/bytearray (ver ShareValidator._HASH_TYPES)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+
+def _flush_detector(ref: "weakref.ref[FraudDetector]"):
+    detector = ref()
+    if detector is not None:
+        detector.flush()
+
+
 # External callable
 def detect_fraud(share: Dict[str, Any], detector: Optional[FraudDetector] = None) -> Tuple[bool, str]:
     global_detector = detector or FraudDetector()
@@ -1,50 +1,57 @@
 import os
-import json
-import uuid
 import time
+import itertools
 import logging
-import importlib.util
-from typing import Dict, Any
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import partial
+from typing import Dict, Any, List
 
-DEFAULT_TIMEOUT = int(os.getenv("VALIDATION_TIMEOUT_SEC", "3"))
+from .validate_share import validate_share
+from .detect_fraud import detect_fraud, FraudDetector
+
+logger = logging.getLogger("validation_service")
+
+_ID_PREFIX = os.urandom(4).hex()
+_id_counter = itertools.count()
 
 MODULE_REGISTRY = {
-    "validator": "validate_share",
-    "fraud": "detect_fraud"
+    "validator": validate_share,
+    "fraud": detect_fraud
 }
 
+def _elapsed_ms(start_ns: int) -> int:
+    return round((time.perf_counter_ns() - start_ns) / 1e6)
+
+
 class ValidationRunner:
-    def __init__(self, timeout: int = DEFAULT_TIMEOUT):
-        self.timeout = timeout
-        self.executor = ThreadPoolExecutor(max_workers=4)
-        self.modules = {}
-        self._bootstrap_modules()
-
-    def _bootstrap_modules(self):
-        for key, name in MODULE_REGISTRY.items():
-            path = os.path.join(os.path.dirname(__file__), f"{name}.py")
-            spec = importlib.util.spec_from_file_location(name, path)
-            if not spec or not spec.loader:
-                raise RuntimeError(f"[BOOTSTRAP] Failed to load module: {name}")
-            mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(mod)
-            self.modules[key] = mod
+    __slots__ = ("detector", "modules")
+
+    def __init__(self):
+        self.detector = FraudDetector(trust_input=True)
+        self.modules = dict(MODULE_REGISTRY)
+        self.modules["fraud"] = partial(MODULE_REGISTRY["fraud"], detector=self.detector)
 
     def _execute(self, func, payload: Dict[str, Any], label: str) -> Any:
-        future = self.executor.submit(func, payload)
         try:
-            result = future.result(timeout=self.timeout)
-            return result
-        except TimeoutError:
-            raise RuntimeError(f"[TIMEOUT] Module '{label}' exceeded {self.timeout}s")
+            return func(payload)
         except Exception as ex:
             raise RuntimeError(f"[RUNTIME] Module '{label}' failed: {ex}")
 
     def validate(self, share: Dict[str, Any]) -> Dict[str, Any]:
+        return self._run(share, self.modules["validator"], self.modules["fraud"])
+
+    def validate_batch(self, shares: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        validator = partial(self.modules["validator"], now_ns=time.time_ns())
+        fraud = self.modules["fraud"]
+        run = self._run
+        results: List[Dict[str, Any]] = [None] * len(shares)
+        for i, share in enumerate(shares):
+            results[i] = run(share, validator, fraud)
+        return results
+
+    def _run(self, share: Dict[str, Any], validator, fraud) -> Dict[str, Any]:
         ctx = {
-            "id": str(uuid.uuid4()),
-            "ts_start": time.time(),
+            "id": f"{_ID_PREFIX}-{next(_id_counter):x}",
+            "ts_start": time.perf_counter_ns(),
             "status": "unknown",
             "reason": None,
             "basic_valid": None,
@@ -54,50 +61,62 @@ class ValidationRunner:
 
         # Validator
         try:
-            t0 = time.time()
-            ctx["basic_valid"] = self._execute(self.modules["validator"].validate_share, share, "validator")
-            ctx["timing"]["validation_ms"] = round((time.time() - t0) * 1000)
+            t0 = time.perf_counter_ns()
+            ctx["basic_valid"] = self._execute(validator, share, "validator")
+            ctx["timing"]["validation_ms"] = _elapsed_ms(t0)
         except Exception as err:
             ctx.update({
                 "status": "error",
                 "reason": str(err),
-                "duration_ms": round((time.time() - ctx["ts_start"]) * 1000)
+                "duration_ms": _elapsed_ms(ctx["ts_start"])
             })
             self._log(ctx, level=logging.ERROR)
             return self._finalize(ctx)
 
+        # Shares rejeitadas pelo validador não entram na janela de fraude
+        if not ctx["basic_valid"][0]:
+            ctx["status"] = "rejected"
+            ctx["duration_ms"] = _elapsed_ms(ctx["ts_start"])
+            self._log(ctx, level=logging.INFO)
+            return self._finalize(ctx)
+
         # Fraud Detection
         try:
-            t1 = time.time()
-            ctx["fraud_detected"] = self._execute(self.modules["fraud"].detect_fraud, share, "fraud")
-            ctx["timing"]["fraud_check_ms"] = round((time.time() - t1) * 1000)
+            t1 = time.perf_counter_ns()
+            ctx["fraud_detected"] = self._execute(fraud, share, "fraud")
+            ctx["timing"]["fraud_check_ms"] = _elapsed_ms(t1)
         except Exception as err:
             ctx.update({
                 "status": "error",
                 "reason": str(err),
-                "duration_ms": round((time.time() - ctx["ts_start"]) * 1000)
+                "duration_ms": _elapsed_ms(ctx["ts_start"])
             })
             self._log(ctx, level=logging.ERROR)
             return self._finalize(ctx)
 
         # Final decision
-        ctx["status"] = "accepted" if ctx["basic_valid"] and not ctx["fraud_detected"] else "rejected"
-        ctx["duration_ms"] = round((time.time() - ctx["ts_start"]) * 1000)
+        fraud_ok, _ = ctx["fraud_detected"]
+        ctx["status"] = "accepted" if fraud_ok else "rejected"
+        ctx["duration_ms"] = _elapsed_ms(ctx["ts_start"])
         self._log(ctx, level=logging.INFO)
         return self._finalize(ctx)
 
     def _log(self, context: Dict[str, Any], level=logging.INFO):
-        log_payload = {
-            "id": context["id"],
-            "status": context["status"],
-            "duration_ms": context.get("duration_ms"),
-            "validation_ms": context["timing"].get("validation_ms"),
-            "fraud_check_ms": context["timing"].get("fraud_check_ms"),
-            "basic_valid": context.get("basic_valid"),
-            "fraud_detected": context.get("fraud_detected"),
-            "error": context.get("reason")
-        }
-        logging.log(level, f"[VALIDATION][{log_payload['id']}] Result: {json.dumps(log_payload)}")
+        if not logger.isEnabledFor(level):
+            return
+        timing = context["timing"]
+        logger.log(
+            level,
+            "[VALIDATION][%s] status=%s dur=%sms validation=%sms fraud_check=%sms valid=%s fraud=%s err=%s",
+            context["id"],
+            context["status"],
+            context.get("duration_ms"),
+            timing.get("validation_ms"),
+            timing.get("fraud_check_ms"),
+            context.get("basic_valid"),
+            context.get("fraud_detected"),
+            context.get("reason")
+        )
 
     def _finalize(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return {
@@ -110,7 +129,13 @@ class ValidationRunner:
             "duration_ms": context["duration_ms"]
         }
 
+_ENGINE = ValidationRunner()
+
+
 # Interface pública
 def run_validation(input_data: Dict[str, Any]) -> Dict[str, Any]:
-    engine = ValidationRunner()
-    return engine.validate(input_data)
+    return _ENGINE.validate(input_data)
+
+
+def run_validation_batch(shares: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return _ENGINE.validate_batch(shares)
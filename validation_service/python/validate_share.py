@@ -1,22 +1,35 @@
 # validation-service/python/validate_share.py
 
 import time
-from typing import Dict, Any, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, Any, Optional, Tuple
+
+DEFAULT_MAX_TIME_DRIFT = 120
 
 
 class ShareValidator:
-    def __init__(self, difficulty_threshold: int = 4, max_time_drift: int = 120):
+    __slots__ = ("difficulty_threshold", "max_time_drift", "_zero_prefix", "_zero_prefix_bytes", "_zero_digest")
+
+    _REQUIRED = frozenset({"worker_id", "hash", "nonce", "timestamp"})
+    _DIGEST_REQUIRED = _REQUIRED - {"hash"}
+    _ALLOWED_TYPES = (str, float, int)
+    _HASH_TYPES = _ALLOWED_TYPES + (bytes, bytearray)
+
+    def __init__(self, difficulty_threshold: int = 4, max_time_drift: int = DEFAULT_MAX_TIME_DRIFT):
         self.difficulty_threshold = difficulty_threshold
         self.max_time_drift = max_time_drift
+        self._zero_prefix = "0" * difficulty_threshold
+        self._zero_prefix_bytes = b"0" * difficulty_threshold
+        self._zero_digest = bytes(difficulty_threshold // 2)
 
-    def run(self, share: Dict[str, Any]) -> Tuple[bool, str]:
+    def run(self, share: Dict[str, Any], now_ns: Optional[int] = None) -> Tuple[bool, str]:
         if not isinstance(share, dict):
             return False, "Expected input of type dict."
 
         if not self._fields_are_valid(share):
             return False, "Missing or invalid fields."
 
-        if not self._timestamp_is_valid(share.get("timestamp", 0.0)):
+        if not self._timestamp_is_valid(share.get("timestamp", 0.0), now_ns):
             return False, "Timestamp is outside acceptable drift window."
 
         if not self._hash_meets_difficulty(share.get("hash", "")):
@@ -24,28 +37,121 @@ class ShareValidator:
 
         return True, "Share is valid."
 
-    def _fields_are_valid(self, share: Dict[str, Any]) -> bool:
-        required_fields = {"worker_id", "hash", "nonce", "timestamp"}
-        for key in required_fields:
-            if key not in share:
-                return False
-            if not isinstance(share[key], (str, float, int)):
-                return False
-        return True
+    def run_digest(self, share: Dict[str, Any], digest: bytes, now_ns: Optional[int] = None) -> Tuple[bool, str]:
+        if not isinstance(share, dict):
+            return False, "Expected input of type dict."
+
+        if not self._fields_are_valid(share, check_hash=False):
+            return False, "Missing or invalid fields."
 
-    def _timestamp_is_valid(self, ts: float) -> bool:
+        if not self._timestamp_is_valid(share.get("timestamp", 0.0), now_ns):
+            return False, "Timestamp is outside acceptable drift window."
+
+        if not self._digest_meets_difficulty(digest):
+            return False, f"Hash does not meet required difficulty threshold of {self.difficulty_threshold}."
+
+        return True, "Share is valid."
+
+    def _fields_are_valid(self, share: Dict[str, Any], check_hash: bool = True) -> bool:
+        if not (self._REQUIRED if check_hash else self._DIGEST_REQUIRED) <= share.keys():
+            return False
+        # Apenas o hash pode chegar como bytes; os demais campos seguem (str, float, int)
+        if check_hash and not isinstance(share["hash"], self._HASH_TYPES):
+            return False
+        allowed = self._ALLOWED_TYPES
+        return all(isinstance(share[key], allowed) for key in self._DIGEST_REQUIRED)
+
+    def _timestamp_is_valid(self, ts: float, now_ns: Optional[int] = None) -> bool:
         if not isinstance(ts, (float, int)):
             return False
-        current_ts = time.time()
-        return abs(current_ts - ts) <= self.max_time_drift
+        if now_ns is None:
+            now_ns = time.time_ns()
+        # Floats ficam em segundos: NaN, inf e valores enormes não cabem em ns inteiros.
+        if isinstance(ts, float):
+            return abs(now_ns / 1e9 - ts) <= self.max_time_drift
+        return abs(now_ns - ts * 1_000_000_000) <= self.max_time_drift * 1_000_000_000
 
     def _hash_meets_difficulty(self, hash_value: str) -> bool:
-        if not isinstance(hash_value, str):
+        if isinstance(hash_value, str):
+            return hash_value.startswith(self._zero_prefix)
+        if isinstance(hash_value, (bytes, bytearray)):
+            return hash_value.startswith(self._zero_prefix_bytes)
+        return False
+
+    def _digest_meets_difficulty(self, digest: bytes) -> bool:
+        # Cada byte do digest bruto carrega dois nibbles hexadecimais.
+        if not isinstance(digest, (bytes, bytearray)):
             return False
-        return hash_value.startswith("0" * self.difficulty_threshold)
+        half = len(self._zero_digest)
+        if digest[:half] != self._zero_digest:
+            return False
+        return self.difficulty_threshold % 2 == 0 or (len(digest) > half and digest[half] < 0x10)
+
+
+# Versão especializada de ShareValidator.run, com as constantes fixadas como argumentos padrão
+@lru_cache(maxsize=8)
+def _make_validator(difficulty: int, drift: int) -> Callable[[Dict[str, Any]], Tuple[bool, str]]:
+    difficulty_msg = f"Hash does not meet required difficulty threshold of {difficulty}."
+
+    def _run(
+        share: Dict[str, Any],
+        now_ns: Optional[int] = None,
+        _zp: str = "0" * difficulty,
+        _zpb: bytes = b"0" * difficulty,
+        _req: frozenset = ShareValidator._REQUIRED,
+        _fields: frozenset = ShareValidator._DIGEST_REQUIRED,
+        _types: tuple = ShareValidator._ALLOWED_TYPES,
+        _hash_types: tuple = ShareValidator._HASH_TYPES,
+        _drift: int = drift,
+        _drift_ns: int = drift * 1_000_000_000,
+        _now_ns: Callable[[], int] = time.time_ns,
+        _msg: str = difficulty_msg,
+    ) -> Tuple[bool, str]:
+        if not isinstance(share, dict):
+            return False, "Expected input of type dict."
+
+        if not _req <= share.keys():
+            return False, "Missing or invalid fields."
+        if not isinstance(share["hash"], _hash_types):
+            return False, "Missing or invalid fields."
+        for key in _fields:
+            if not isinstance(share[key], _types):
+                return False, "Missing or invalid fields."
+
+        ts = share["timestamp"]
+        if not isinstance(ts, (float, int)):
+            return False, "Timestamp is outside acceptable drift window."
+        if isinstance(ts, float):
+            if not abs((now_ns or _now_ns()) / 1e9 - ts) <= _drift:
+                return False, "Timestamp is outside acceptable drift window."
+        elif abs((now_ns or _now_ns()) - ts * 1_000_000_000) > _drift_ns:
+            return False, "Timestamp is outside acceptable drift window."
+
+        hash_value = share["hash"]
+        if isinstance(hash_value, str):
+            if not hash_value.startswith(_zp):
+                return False, _msg
+        elif isinstance(hash_value, (bytes, bytearray)):
+            if not hash_value.startswith(_zpb):
+                return False, _msg
+        else:
+            return False, _msg
+
+        return True, "Share is valid."
+
+    return _run
 
 
 # Interface simplificada para chamadas externas
-def validate_share(share: Dict[str, Any], difficulty: int = 4) -> Tuple[bool, str]:
-    validator = ShareValidator(difficulty_threshold=difficulty)
-    return validator.run(share)
+def validate_share(share: Dict[str, Any], difficulty: int = 4, now_ns: Optional[int] = None) -> Tuple[bool, str]:
+    return _make_validator(difficulty, DEFAULT_MAX_TIME_DRIFT)(share, now_ns)
+
+
+@lru_cache(maxsize=8)
+def _get_validator(difficulty: int) -> ShareValidator:
+    return ShareValidator(difficulty_threshold=difficulty)
+
+
+# Variante para chamadores que já possuem o digest bruto (32 bytes) em vez do hash hexadecimal
+def validate_share_digest(share: Dict[str, Any], digest: bytes, difficulty: int = 4, now_ns: Optional[int] = None) -> Tuple[bool, str]:
+    return _get_validator(difficulty).run_digest(share, digest, now_ns)
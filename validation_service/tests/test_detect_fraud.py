@@ -0,0 +1,102 @@
+import gc
+import importlib
+import json
+import time
+import weakref
+
+from python.detect_fraud import FraudDetector, FraudPolicy
+
+# O pacote reexporta a função detect_fraud com o mesmo nome do módulo
+detect_fraud = importlib.import_module("python.detect_fraud")
+
+
+def _share(worker_id, nonce, ts=1000.0):
+    return {"worker_id": worker_id, "ip": "10.0.0.1", "nonce": nonce, "timestamp": ts}
+
+
+def test_refresh_policy_raises_limit_for_tracked_windows():
+    policy = FraudPolicy(max_shares=3)
+    detector = FraudDetector(policy)
+    for i in range(4):
+        detector.analyze(_share("w1", 10_000 + i * 7919))
+
+    policy.max_shares = 5
+    detector.refresh_policy()
+    results = [detector.analyze(_share("w1", 50_000 + i * 7919)) for i in range(10)]
+
+    assert results[-1] == (False, "Excessive share frequency.")
+    assert len(detector.cache[("w1", "10.0.0.1")]) == 6
+
+
+def test_refresh_policy_shrinks_windows_and_keys():
+    policy = FraudPolicy(max_shares=10, max_keys=5)
+    detector = FraudDetector(policy)
+    for w in range(5):
+        for i in range(8):
+            detector.analyze(_share(f"w{w}", 10_000 + i * 7919))
+
+    policy.max_shares = 2
+    policy.max_keys = 2
+    detector.refresh_policy()
+
+    assert len(detector.cache) == 2
+    assert ("w4", "10.0.0.1") in detector.cache
+    assert ("w0", "10.0.0.1") not in detector.cache
+    window = detector.cache[("w4", "10.0.0.1")]
+    assert len(window) == 3
+    assert window.nonce_sum == sum(n for _, n in window.entries)
+
+
+def _alert_share(i):
+    return _share("w1", 5, ts=1000.0 + i)
+
+
+def test_reports_flushed_after_burst(tmp_path, monkeypatch):
+    monkeypatch.setattr(detect_fraud, "REPORT_FLUSH_SECONDS", 0.05)
+    path = tmp_path / "fraud.jsonl"
+    detector = FraudDetector(persist_path=str(path))
+
+    assert detector.analyze(_alert_share(0))[0] is False
+    time.sleep(0.3)
+
+    assert len(path.read_text().splitlines()) == 1
+    detector.close()
+
+
+def test_reports_flushed_on_count_threshold(tmp_path):
+    path = tmp_path / "fraud.jsonl"
+    detector = FraudDetector(persist_path=str(path))
+
+    for i in range(detect_fraud.REPORT_FLUSH_COUNT):
+        detector.analyze(_alert_share(i))
+
+    assert len(path.read_text().splitlines()) == detect_fraud.REPORT_FLUSH_COUNT
+    detector.close()
+
+
+def test_detector_with_persist_path_is_collectable(tmp_path):
+    path = tmp_path / "fraud.jsonl"
+    detector = FraudDetector(persist_path=str(path))
+    detector.analyze(_alert_share(0))
+    fh = detector._persist_fh
+    ref = weakref.ref(detector)
+
+    del detector
+    gc.collect()
+
+    assert ref() is None
+    assert fh.closed
+    assert len(path.read_text().splitlines()) == 1
+
+
+def test_report_with_bytes_hash_is_persisted(tmp_path):
+    path = tmp_path / "fraud.jsonl"
+    detector = FraudDetector(persist_path=str(path))
+    share = dict(_alert_share(0), hash=b"0000ab")
+
+    assert detector.analyze(share) == (False, "Suspicious nonce uniformity.")
+    detector.close()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["share"]["hash"] == b"0000ab".hex()
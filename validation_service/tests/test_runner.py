@@ -0,0 +1,87 @@
+import time
+
+from python import runner as runner_module
+from python.runner import ValidationRunner
+
+
+def _share(nonce, ts):
+    return {"worker_id": "w1", "ip": "10.0.0.1", "hash": "0000abcd", "nonce": nonce, "timestamp": ts}
+
+
+def test_string_nonce_cannot_bypass_spam_detection():
+    runner = ValidationRunner()
+    ts = time.time()
+    limit = runner.detector.policy.max_shares + 1
+
+    results = [runner.validate(_share("7", ts)) for _ in range(limit)]
+
+    assert all(r["status"] == "rejected" for r in results)
+    assert all(r["fraud_detected"] == (False, "Malformed or incomplete share.") for r in results)
+
+
+def test_int_nonce_spam_is_rejected():
+    runner = ValidationRunner()
+    ts = time.time()
+    limit = runner.detector.policy.max_shares + 1
+
+    results = [runner.validate(_share(10_000 + i * 7919, ts)) for i in range(limit)]
+
+    assert results[-1]["status"] == "rejected"
+    assert results[-1]["fraud_detected"] == (False, "Excessive share frequency.")
+
+
+def test_validate_batch_returns_one_result_per_share_in_order():
+    runner = ValidationRunner()
+    ts = time.time()
+    shares = [
+        _share(10_000, ts),
+        {"worker_id": "w1"},
+        _share(20_000, ts - 1000),
+        dict(_share(30_000, ts), hash="ffff"),
+        _share(40_000, ts),
+    ]
+
+    results = runner.validate_batch(shares)
+
+    assert [r["basic_valid"][0] for r in results] == [True, False, False, False, True]
+    assert [r["basic_valid"][1] for r in results[1:4]] == [
+        "Missing or invalid fields.",
+        "Timestamp is outside acceptable drift window.",
+        "Hash does not meet required difficulty threshold of 4.",
+    ]
+    assert [r["status"] for r in results[1:4]] == ["rejected"] * 3
+    assert results[-1]["status"] == "accepted"
+    assert len({r["id"] for r in results}) == len(shares)
+
+
+def test_validate_batch_reads_clock_once(monkeypatch):
+    runner = ValidationRunner()
+    batch_now_ns = time.time_ns() - 1000 * 1_000_000_000
+    calls = []
+
+    def fake_time_ns():
+        calls.append(1)
+        return batch_now_ns
+
+    ts = batch_now_ns / 1e9
+    shares = [_share(10_000 + i * 7919, ts) for i in range(5)]
+    monkeypatch.setattr(runner_module.time, "time_ns", fake_time_ns)
+
+    results = runner.validate_batch(shares)
+
+    assert len(calls) == 1
+    assert all(r["basic_valid"] == (True, "Share is valid.") for r in results)
+
+
+def test_fraud_windows_persist_across_batches():
+    runner = ValidationRunner()
+    ts = time.time()
+    max_shares = runner.detector.policy.max_shares
+    nonces = iter(range(10_000, 10_000 + 7919 * (max_shares + 1), 7919))
+
+    first = runner.validate_batch([_share(next(nonces), ts) for _ in range(max_shares)])
+    second = runner.validate_batch([_share(next(nonces), ts)])
+
+    assert first[-1]["status"] == "accepted"
+    assert second[0]["status"] == "rejected"
+    assert second[0]["fraud_detected"] == (False, "Excessive share frequency.")
@@ -0,0 +1,95 @@
+import math
+import time
+
+import pytest
+
+from python.runner import ValidationRunner
+from python.validate_share import ShareValidator, validate_share, validate_share_digest
+
+DRIFT_MSG = (False, "Timestamp is outside acceptable drift window.")
+
+
+def _share(**overrides):
+    share = {"worker_id": "w1", "hash": "0000abcd", "nonce": 123456, "timestamp": time.time()}
+    share.update(overrides)
+    return share
+
+
+@pytest.mark.parametrize("ts", [math.nan, math.inf, -math.inf, 1e300, -1e300])
+def test_non_finite_and_huge_timestamps_are_rejected(ts):
+    share = _share(timestamp=ts)
+
+    assert validate_share(share) == DRIFT_MSG
+    assert validate_share(share, now_ns=time.time_ns()) == DRIFT_MSG
+    assert ShareValidator().run(share) == DRIFT_MSG
+    assert ValidationRunner().validate(share)["status"] == "rejected"
+
+
+@pytest.mark.parametrize("offset, expected", [(0, True), (119, True), (121, False), (-121, False)])
+def test_timestamp_drift_window(offset, expected):
+    for ts in (time.time() + offset, int(time.time()) + offset):
+        assert validate_share(_share(timestamp=ts))[0] is expected
+        assert ShareValidator().run(_share(timestamp=ts))[0] is expected
+
+
+@pytest.mark.parametrize("hash_value", [b"0000abcd", bytearray(b"0000abcd")])
+def test_bytes_hash_is_accepted(hash_value):
+    share = _share(hash=hash_value)
+
+    assert validate_share(share) == (True, "Share is valid.")
+    assert ShareValidator().run(share) == (True, "Share is valid.")
+
+
+@pytest.mark.parametrize("field", ["worker_id", "nonce", "timestamp"])
+@pytest.mark.parametrize("value", [b"123456", bytearray(b"123456")])
+def test_bytes_only_allowed_for_hash(field, value):
+    share = _share(**{field: value})
+    expected = (False, "Missing or invalid fields.")
+
+    assert validate_share(share) == expected
+    assert ShareValidator().run(share) == expected
+    assert ShareValidator().run_digest(share, bytes(32)) == expected
+
+
+def _digest(leading_hex):
+    return bytes.fromhex(leading_hex.ljust(64, "f"))
+
+
+@pytest.mark.parametrize("difficulty, leading_hex, expected", [
+    (4, "0000", True),
+    (4, "0001", False),
+    (4, "000f", False),
+    (3, "000f", True),
+    (3, "001f", False),
+    (3, "0010", False),
+    (5, "00000f", True),
+    (5, "000010", False),
+    (5, "0001", False),
+    (1, "0f", True),
+    (1, "10", False),
+    (0, "ff", True),
+])
+def test_digest_difficulty(difficulty, leading_hex, expected):
+    share = _share()
+    share.pop("hash")
+    digest = _digest(leading_hex)
+
+    assert digest.hex().startswith("0" * difficulty) is expected
+    assert validate_share_digest(share, digest, difficulty)[0] is expected
+    assert validate_share_digest(share, bytearray(digest), difficulty)[0] is expected
+
+
+@pytest.mark.parametrize("difficulty, digest", [
+    (4, b"\x00"),
+    (5, b"\x00\x00"),
+    (6, b""),
+])
+def test_digest_shorter_than_difficulty_is_rejected(difficulty, digest):
+    assert validate_share_digest(_share(), digest, difficulty) == (
+        False, f"Hash does not meet required difficulty threshold of {difficulty}."
+    )
+
+
+@pytest.mark.parametrize("digest", ["0000ffff", 0, None, memoryview(bytes(32))])
+def test_non_bytes_digest_is_rejected(digest):
+    assert validate_share_digest(_share(), digest)[0] is False